@@ -1,11 +1,15 @@
+import argparse
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
 import pandas as pd
 import time
 import random
 import os
+import re
 from datetime import datetime
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 # Define business focus categories
 BUSINESS_CATEGORIES = {
@@ -30,14 +34,44 @@ BUSINESS_CATEGORIES = {
     "19": "E-Commerce"
 }
 
+# Low-cardinality columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = ['Business Category']
+
+# Number of categories scraped at the same time
+MAX_CATEGORY_WORKERS = 8
+
+# Headers to simulate a browser visit
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# CSS selectors for the member-list markup
+MEMBER_BLOCK_SELECTOR = 'div.media.mt-5.member-list-img'
+LOGO_SELECTOR = 'img.mr-3'
+MEMBER_BODY_SELECTOR = 'div.media-body.member-body'
+WEBSITE_LINK_SELECTOR = 'a[target="_blank"]'
+DETAILS_LINK_SELECTOR = 'a.btn.btn-bacco-2'
+PAGINATION_LINK_SELECTOR = 'ul.pagination a'
+PAGE_PARAM_RE = re.compile(r'[?&]page=(\d+)')
+
+# Maps CR and LF to spaces in a single translate() pass
+LINE_BREAK_TRANS = str.maketrans({'\r': ' ', '\n': ' '})
+
+# Shared session so every page request reuses pooled keep-alive connections
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+))
+
 
 def create_data_directory():
     """Create directories for storing scraped data"""
     base_dir = "bacco-data"
     categories_dir = os.path.join(base_dir, "categories")
-    for directory in [base_dir, categories_dir]:
-        if not os.path.exists(directory):
-            os.makedirs(directory)
+    os.makedirs(categories_dir, exist_ok=True)
     return base_dir, categories_dir
 
 
@@ -45,83 +79,87 @@ def clean_text_for_excel(text):
     """Clean text to remove problematic characters for Excel"""
     if not isinstance(text, str):
         return text
-    return str(text).replace('\r\n', ' ').replace('\n', ' ').replace('\r', ' ')
+    return text.translate(LINE_BREAK_TRANS)
 
 
 def get_page_content(url):
-    """Fetch the page content with error handling and retries"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.text
-        except requests.RequestException as e:
-            if attempt == max_retries - 1:
-                print(f"Error fetching {url}: {e}")
-                return None
-            time.sleep(random.uniform(1, 2))
-
-
-def parse_member_data(html):
-    """Parse the HTML content and extract member information"""
-    soup = BeautifulSoup(html, 'html.parser')
+    """Fetch the raw page bytes; retries are handled by the session adapter"""
+    try:
+        response = SESSION.get(url, timeout=10)
+        response.raise_for_status()
+        # Lexbor decodes bytes itself, so skip requests' charset detection and str copy
+        return response.content
+    except requests.RequestException as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+
+
+def parse_last_page(tree):
+    """Return the highest page number linked from the pagination bar (1 without one)"""
+    last_page = 1
+    for link in tree.css(PAGINATION_LINK_SELECTOR):
+        match = PAGE_PARAM_RE.search(link.attributes.get('href') or '')
+        if match:
+            last_page = max(last_page, int(match.group(1)))
+    return last_page
+
+
+def parse_member_data(html, category_name=None):
+    """Parse the HTML content and return (members tagged with their category, last page number)"""
+    tree = LexborHTMLParser(html)
     members_data = []
 
-    member_blocks = soup.find_all('div', class_='media mt-5 member-list-img')
+    member_blocks = tree.css(MEMBER_BLOCK_SELECTOR)
 
     for block in member_blocks:
         member = {}
 
         # Get logo URL and company name
-        logo_img = block.find('img', class_='mr-3')
+        logo_img = block.css_first(LOGO_SELECTOR)
         if logo_img:
-            member['Company Name'] = clean_text_for_excel(logo_img.get('alt', 'N/A'))
-            member['Logo'] = clean_text_for_excel(logo_img.get('src', 'N/A'))
+            member['Company Name'] = clean_text_for_excel(logo_img.attributes.get('alt', 'N/A'))
+            member['Logo'] = clean_text_for_excel(logo_img.attributes.get('src', 'N/A'))
 
-        body = block.find('div', class_='media-body member-body')
+        body = block.css_first(MEMBER_BODY_SELECTOR)
         if body:
-            name_tag = body.find('h5')
+            name_tag = body.css_first('h5')
             if name_tag:
-                member['Company Name'] = clean_text_for_excel(name_tag.text.strip())
+                member['Company Name'] = clean_text_for_excel(name_tag.text().strip())
 
-            paragraphs = body.find_all('p')
+            paragraphs = body.css('p')
             for p in paragraphs:
-                text = p.text.strip()
-                if text.startswith('Phone :'):
-                    member['Phone'] = clean_text_for_excel(text.replace('Phone :', '').strip())
-                elif text.startswith('Email :'):
-                    member['Email'] = clean_text_for_excel(text.replace('Email :', '').strip())
+                label, _, value = p.text().strip().partition(' :')
+                if label == 'Phone':
+                    member['Phone'] = clean_text_for_excel(value.strip())
+                elif label == 'Email':
+                    member['Email'] = clean_text_for_excel(value.strip())
 
-            website_link = body.find('a', target='_blank')
+            website_link = body.css_first(WEBSITE_LINK_SELECTOR)
             if website_link:
-                member['Website'] = clean_text_for_excel(website_link.text.strip())
+                member['Website'] = clean_text_for_excel(website_link.text().strip())
 
-            details_link = body.find('a', class_='btn btn-bacco-2')
+            details_link = body.css_first(DETAILS_LINK_SELECTOR)
             if details_link:
-                member['Details URL'] = clean_text_for_excel(details_link['href'])
+                member['Details URL'] = clean_text_for_excel(details_link.attributes['href'])
 
+        member['Business Category'] = category_name
         members_data.append(member)
 
-    return members_data
+    return members_data, parse_last_page(tree)
 
 
 def save_data(data, filename):
-    """Save data to Excel file with CSV fallback"""
+    """Save data to a Parquet file with CSV fallback"""
     try:
-        # Try saving as Excel first
-        df = pd.DataFrame(data)
-        df.to_excel(filename, index=False, engine='openpyxl')
-        print(f"Data successfully saved to Excel: {filename}")
+        df = pd.DataFrame(data).astype(dict.fromkeys(CATEGORICAL_COLUMNS, 'category'))
+        df.to_parquet(filename, index=False, compression='zstd')
+        print(f"Data successfully saved to: {filename}")
         return True
     except Exception as e:
-        print(f"Error saving to Excel: {e}")
+        print(f"Error saving {filename}: {e}")
         try:
             # Fallback to CSV
-            csv_filename = filename.replace('.xlsx', '.csv')
+            csv_filename = os.path.splitext(filename)[0] + '.csv'
             df.to_csv(csv_filename, index=False, encoding='utf-8')
             print(f"Data saved as CSV instead: {csv_filename}")
             return True
@@ -130,74 +168,105 @@ def save_data(data, filename):
             return False
 
 
-def scrape_category(category_id, category_name, base_dir, categories_dir):
+def save_workbook(sheets, filename):
+    """Save every sheet name -> rows mapping into one Excel workbook"""
+    try:
+        with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
+            for sheet_name, data in sheets.items():
+                # Excel limits sheet names to 31 characters
+                df = pd.DataFrame(data).astype(dict.fromkeys(CATEGORICAL_COLUMNS, 'category'))
+                df.to_excel(writer, sheet_name=sheet_name[:31], index=False)
+        print(f"Data successfully saved to Excel: {filename}")
+        return True
+    except Exception as e:
+        print(f"Error saving to Excel: {e}")
+        return False
+
+
+def scrape_category(category_id, category_name):
     """Scrape members for a specific business focus category"""
-    print(f"\nScraping category: {category_name}")
+    print(f"Scraping category: {category_name}")
     members = []
     page = 1
+    last_page = 1
 
-    while True:
+    while page <= last_page:
         url = f"https://www.bacco.org.bd/member-list?business_foc%5B%5D={category_id}&page={page}"
-        print(f"Fetching page {page}...")
+        print(f"[{category_name}] Fetching page {page}...")
 
         html = get_page_content(url)
         if not html:
             break
 
-        page_members = parse_member_data(html)
+        page_members, linked_last_page = parse_member_data(html, category_name)
         if not page_members:
             break
 
-        for member in page_members:
-            member['Business Category'] = category_name
+        # Page 1 links to the last page, so no request past the end is needed
+        if page == 1:
+            last_page = linked_last_page
 
         members.extend(page_members)
-        print(f"Found {len(page_members)} members on page {page}")
+        print(f"[{category_name}] Found {len(page_members)} members on page {page} of {last_page}")
 
-        # Add random delay between requests
-        time.sleep(random.uniform(1, 3))
         page += 1
-
-    if members:
-        # Save category-specific file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        category_filename = os.path.join(categories_dir, f"{category_name.lower().replace(' ', '_')}_{timestamp}.xlsx")
-        save_data(members, category_filename)
+        if page <= last_page:
+            # Add random delay between requests
+            time.sleep(random.uniform(1, 3))
 
     return members
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape the BACCO member list by business category")
+    parser.add_argument('--excel', action='store_true', help="save one multi-sheet .xlsx workbook instead of Parquet files")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     print("Starting the data collection process...")
     base_dir, categories_dir = create_data_directory()
 
     all_members = []
-
-    # Scrape each category
-    for category_id, category_name in BUSINESS_CATEGORIES.items():
-        category_members = scrape_category(category_id, category_name, base_dir, categories_dir)
-        all_members.extend(category_members)
+    category_members = {}
+
+    # Scrape categories concurrently; results are collected in category order
+    with ThreadPoolExecutor(max_workers=MAX_CATEGORY_WORKERS) as executor:
+        futures = {
+            category_name: executor.submit(scrape_category, category_id, category_name)
+            for category_id, category_name in BUSINESS_CATEGORIES.items()
+        }
+        for category_name, future in futures.items():
+            category_members[category_name] = future.result()
+            all_members.extend(category_members[category_name])
 
     if all_members:
-        # Save complete dataset
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        complete_filename = os.path.join(base_dir, f"all_members_{timestamp}.xlsx")
-        save_data(all_members, complete_filename)
+        if args.excel:
+            # Complete dataset and every category go into a single workbook
+            sheets = {'All Members': all_members}
+            sheets.update((name, members) for name, members in category_members.items() if members)
+            save_workbook(sheets, os.path.join(base_dir, f"bacco_members_{timestamp}.xlsx"))
+        else:
+            save_data(all_members, os.path.join(base_dir, f"all_members_{timestamp}.parquet"))
+            for category_name, members in category_members.items():
+                if members:
+                    category_filename = os.path.join(categories_dir, f"{category_name.lower().replace(' ', '_')}_{timestamp}.parquet")
+                    save_data(members, category_filename)
 
         print("\nData Collection Summary:")
         print(f"Total members collected: {len(all_members)}")
         print(f"Categories processed: {len(BUSINESS_CATEGORIES)}")
         print(f"Complete data saved to: {base_dir}")
-        print(f"Category-specific data saved to: {categories_dir}")
-
-        # Print members per category
-        category_counts = defaultdict(int)
-        for member in all_members:
-            category_counts[member['Business Category']] += 1
+        if not args.excel:
+            print(f"Category-specific data saved to: {categories_dir}")
 
+        # Members are already grouped by category, so the counts are just list lengths
         print("\nMembers per category:")
-        for category, count in category_counts.items():
-            print(f"- {category}: {count} members")
+        for category, members in category_members.items():
+            if members:
+                print(f"- {category}: {len(members)} members")
     else:
         print("No data was collected.")
 
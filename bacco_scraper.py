@@ -1,17 +1,52 @@
+import argparse
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
 import pandas as pd
 import time
 import random
 import os
+import re
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+MEMBER_LIST_URL = "https://www.bacco.org.bd/member-list"
+
+# Number of member-list pages fetched at the same time
+MAX_PAGE_WORKERS = 8
+
+# Headers to simulate a browser visit
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# CSS selectors for the member-list markup
+MEMBER_BLOCK_SELECTOR = 'div.media.mt-5.member-list-img'
+LOGO_SELECTOR = 'img.mr-3'
+MEMBER_BODY_SELECTOR = 'div.media-body.member-body'
+WEBSITE_LINK_SELECTOR = 'a[target="_blank"]'
+DETAILS_LINK_SELECTOR = 'a.btn.btn-bacco-2'
+PAGINATION_LINK_SELECTOR = 'ul.pagination a'
+PAGE_PARAM_RE = re.compile(r'[?&]page=(\d+)')
+
+# Maps CR and LF to spaces in a single translate() pass
+LINE_BREAK_TRANS = str.maketrans({'\r': ' ', '\n': ' '})
+
+# Shared session so every page request reuses pooled keep-alive connections
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+))
 
 
 def create_data_directory():
     """Create directory for storing scraped data"""
     base_dir = "bacco-data"
-    if not os.path.exists(base_dir):
-        os.makedirs(base_dir)
+    os.makedirs(base_dir, exist_ok=True)
     return base_dir
 
 
@@ -19,89 +54,96 @@ def clean_text_for_excel(text):
     """Clean text to remove problematic characters for Excel"""
     if not isinstance(text, str):
         return text
-    return str(text).replace('\r\n', ' ').replace('\n', ' ').replace('\r', ' ')
+    return text.translate(LINE_BREAK_TRANS)
 
 
 def get_page_content(url):
-    """Fetch the page content with error handling and retries"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.text
-        except requests.RequestException as e:
-            if attempt == max_retries - 1:
-                print(f"Error fetching {url}: {e}")
-                return None
-            time.sleep(random.uniform(1, 2))
+    """Fetch the raw page bytes; retries are handled by the session adapter"""
+    try:
+        response = SESSION.get(url, timeout=10)
+        response.raise_for_status()
+        # Lexbor decodes bytes itself, so skip requests' charset detection and str copy
+        return response.content
+    except requests.RequestException as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+
+
+def parse_last_page(tree):
+    """Return the highest page number linked from the pagination bar (1 without one)"""
+    last_page = 1
+    for link in tree.css(PAGINATION_LINK_SELECTOR):
+        match = PAGE_PARAM_RE.search(link.attributes.get('href') or '')
+        if match:
+            last_page = max(last_page, int(match.group(1)))
+    return last_page
 
 
 def parse_member_data(html):
-    """Parse the HTML content and extract member information"""
-    soup = BeautifulSoup(html, 'html.parser')
+    """Parse the HTML content and return (member information, last page number)"""
+    tree = LexborHTMLParser(html)
     members_data = []
 
-    member_blocks = soup.find_all('div', class_='media mt-5 member-list-img')
+    member_blocks = tree.css(MEMBER_BLOCK_SELECTOR)
 
     for block in member_blocks:
         member = {}
 
         # Get logo URL and company name
-        logo_img = block.find('img', class_='mr-3')
+        logo_img = block.css_first(LOGO_SELECTOR)
         if logo_img:
-            member['Company Name'] = clean_text_for_excel(logo_img.get('alt', 'N/A'))
-            member['Logo'] = clean_text_for_excel(logo_img.get('src', 'N/A'))
+            member['Company Name'] = clean_text_for_excel(logo_img.attributes.get('alt', 'N/A'))
+            member['Logo'] = clean_text_for_excel(logo_img.attributes.get('src', 'N/A'))
 
-        body = block.find('div', class_='media-body member-body')
+        body = block.css_first(MEMBER_BODY_SELECTOR)
         if body:
             # Update company name from h5 if available
-            name_tag = body.find('h5')
+            name_tag = body.css_first('h5')
             if name_tag:
-                member['Company Name'] = clean_text_for_excel(name_tag.text.strip())
+                member['Company Name'] = clean_text_for_excel(name_tag.text().strip())
 
             # Get phone and email
-            paragraphs = body.find_all('p')
+            paragraphs = body.css('p')
             for p in paragraphs:
-                text = p.text.strip()
-                if text.startswith('Phone :'):
-                    member['Phone'] = clean_text_for_excel(text.replace('Phone :', '').strip())
-                elif text.startswith('Email :'):
-                    member['Email'] = clean_text_for_excel(text.replace('Email :', '').strip())
+                label, _, value = p.text().strip().partition(' :')
+                if label == 'Phone':
+                    member['Phone'] = clean_text_for_excel(value.strip())
+                elif label == 'Email':
+                    member['Email'] = clean_text_for_excel(value.strip())
 
             # Get website
-            website_link = body.find('a', target='_blank')
+            website_link = body.css_first(WEBSITE_LINK_SELECTOR)
             if website_link:
-                member['Website'] = clean_text_for_excel(website_link.text.strip())
+                member['Website'] = clean_text_for_excel(website_link.text().strip())
 
             # Get details URL
-            details_link = body.find('a', class_='btn btn-bacco-2')
+            details_link = body.css_first(DETAILS_LINK_SELECTOR)
             if details_link:
-                member['Details URL'] = clean_text_for_excel(details_link['href'])
+                member['Details URL'] = clean_text_for_excel(details_link.attributes['href'])
 
         members_data.append(member)
 
-    return members_data
+    return members_data, parse_last_page(tree)
 
 
-def save_data(data, base_dir):
-    """Save data to Excel file with CSV fallback"""
+def save_data(data, base_dir, excel=False):
+    """Save data to a Parquet file (or Excel when requested) with CSV fallback"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    excel_filename = os.path.join(base_dir, f"bacco_members_{timestamp}.xlsx")
+    extension = 'xlsx' if excel else 'parquet'
+    filename = os.path.join(base_dir, f"bacco_members_{timestamp}.{extension}")
     csv_filename = os.path.join(base_dir, f"bacco_members_{timestamp}.csv")
 
     df = pd.DataFrame(data)
 
     try:
-        # Try saving as Excel first
-        df.to_excel(excel_filename, index=False, engine='openpyxl')
-        print(f"Data successfully saved to Excel: {excel_filename}")
-        return excel_filename
+        if excel:
+            df.to_excel(filename, index=False, engine='openpyxl')
+        else:
+            df.to_parquet(filename, index=False, compression='zstd')
+        print(f"Data successfully saved to: {filename}")
+        return filename
     except Exception as e:
-        print(f"Error saving to Excel: {e}")
+        print(f"Error saving {filename}: {e}")
         try:
             # Fallback to CSV
             df.to_csv(csv_filename, index=False, encoding='utf-8')
@@ -112,35 +154,43 @@ def save_data(data, base_dir):
             return None
 
 
-def main():
-    print("Starting the data collection process...")
-    base_dir = create_data_directory()
-    base_url = "https://www.bacco.org.bd/member-list"
-    all_members = []
-    page = 1
+def scrape_page(page):
+    """Fetch and parse one member-list page, returning (members, last page number)"""
+    print(f"Fetching page {page}...")
+    html = get_page_content(f"{MEMBER_LIST_URL}?page={page}")
+    if not html:
+        return [], 1
 
-    while True:
-        print(f"Fetching page {page}...")
-        url = f"{base_url}?page={page}"
-        html = get_page_content(url)
+    members, last_page = parse_member_data(html)
+    print(f"Processed {len(members)} members from page {page}")
 
-        if not html:
-            break
+    # Add random delay before this worker's next request
+    time.sleep(random.uniform(1, 3))
+    return members, last_page
 
-        members = parse_member_data(html)
-        if not members:
-            break
 
-        all_members.extend(members)
-        print(f"Processed {len(members)} members from page {page}")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape the BACCO member list")
+    parser.add_argument('--excel', action='store_true', help="save an .xlsx workbook instead of a Parquet file")
+    return parser.parse_args()
 
-        # Add random delay between requests
-        time.sleep(random.uniform(1, 3))
-        page += 1
+
+def main():
+    args = parse_args()
+    print("Starting the data collection process...")
+    base_dir = create_data_directory()
+    all_members, last_page = scrape_page(1)
+
+    if all_members:
+        print(f"Total pages to process: {last_page}")
+        # The page count is known from page 1, so the rest can be fetched in parallel
+        with ThreadPoolExecutor(max_workers=MAX_PAGE_WORKERS) as executor:
+            for members, _ in executor.map(scrape_page, range(2, last_page + 1)):
+                all_members.extend(members)
 
     if all_members:
         print(f"\nTotal members collected: {len(all_members)}")
-        saved_file = save_data(all_members, base_dir)
+        saved_file = save_data(all_members, base_dir, excel=args.excel)
         if saved_file:
             print("\nData Collection Summary:")
             print(f"Total members: {len(all_members)}")
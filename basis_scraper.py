@@ -1,6 +1,8 @@
-import requests
+import argparse
+import asyncio
+import aiohttp
+import orjson
 import pandas as pd
-import time
 import random
 import os
 from collections import defaultdict
@@ -15,15 +17,31 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
+# Output columns of the complete dataset; profile fields stay empty when a profile fetch fails
+COLUMN_NAMES = [
+    "Company Name", "Membership No", "Membership Type", "Establishment", "Logo URL", "Short Profile",
+    "Address", "Area", "Postcode", "Phone", "Email", "Company Website", "Legal Structure", "Valid Till",
+    "Services"
+]
+
+# Low-cardinality columns, interned while scraping and stored as pandas categoricals
+CATEGORICAL_COLUMNS = ["Membership Type", "Services"]
+INTERNED_TEXT = {}
+
+# Spaces and characters Windows or POSIX do not allow in filenames
+FILENAME_TRANS = str.maketrans(dict.fromkeys('/\\: *?"<>|\t\n\r', "_"))
+
+# Maximum number of requests in flight against basis.org.bd
+MAX_CONCURRENCY = 32
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30)
+
 
 def create_directories():
     """Create necessary directories for storing data."""
     base_dir = "basis-data"
     categories_dir = os.path.join(base_dir, "service-categories")
 
-    for directory in [base_dir, categories_dir]:
-        if not os.path.exists(directory):
-            os.makedirs(directory)
+    os.makedirs(categories_dir, exist_ok=True)
 
     return base_dir, categories_dir
 
@@ -35,27 +53,74 @@ def clean_text(text):
     return str(text).replace('\r\n', ' ').replace('\n', ' ').replace('\r', ' ')
 
 
-def get_member_list(page=1):
-    """Fetch paginated member list."""
-    params = {"page": page, "team": ""}
-    try:
-        response = requests.get(MEMBER_LIST_ENDPOINT, headers=HEADERS, params=params)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching member list page {page}: {e}")
-        return None
+def intern_text(text):
+    """Return one shared copy of a value that repeats across many members."""
+    return INTERNED_TEXT.setdefault(text, text)
 
 
-def get_company_profile(membership_no):
+async def get_member_list(session, semaphore, page=1):
+    """Fetch paginated member list."""
+    params = {"page": page, "team": ""}
+    async with semaphore:
+        try:
+            async with session.get(MEMBER_LIST_ENDPOINT, params=params) as response:
+                response.raise_for_status()
+                return orjson.loads(await response.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as e:
+            print(f"Error fetching member list page {page}: {e}")
+            return None
+        finally:
+            # Add delay before this slot is reused
+            await asyncio.sleep(random.uniform(2, 3))
+
+
+async def get_company_profile(session, semaphore, membership_no):
     """Fetch detailed company profile."""
-    try:
-        response = requests.get(f"{PROFILE_ENDPOINT}/{membership_no}", headers=HEADERS)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching profile for {membership_no}: {e}")
-        return None
+    async with semaphore:
+        print(f"Fetching profile for member: {membership_no}")
+        try:
+            async with session.get(f"{PROFILE_ENDPOINT}/{membership_no}") as response:
+                response.raise_for_status()
+                return orjson.loads(await response.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as e:
+            print(f"Error fetching profile for {membership_no}: {e}")
+            return None
+        finally:
+            # Add delay before this slot is reused
+            await asyncio.sleep(random.uniform(1, 2))
+
+
+async def collect_members():
+    """Fetch all member list pages, then every member profile, concurrently.
+
+    Returns a list of (member, detailed_profile) pairs.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_CONCURRENCY)
+
+    async with aiohttp.ClientSession(headers=HEADERS, connector=connector, timeout=REQUEST_TIMEOUT) as session:
+        print("\nProcessing page 1...")
+        first_page = await get_member_list(session, semaphore, 1)
+        if not first_page:
+            return []
+
+        total_pages = first_page.get("meta", {}).get("last_page") or 1
+        print(f"Total pages to process: {total_pages}")
+
+        # The page count is known now, so the remaining pages can be fetched together
+        other_pages = await asyncio.gather(
+            *(get_member_list(session, semaphore, page) for page in range(2, total_pages + 1))
+        )
+
+        members = []
+        for response in [first_page, *other_pages]:
+            if response:
+                members.extend(response.get("data", []))
+
+        profiles = await asyncio.gather(
+            *(get_company_profile(session, semaphore, member.get("membership_no")) for member in members)
+        )
+        return list(zip(members, profiles))
 
 
 def process_member_data(member_data, detailed_profile):
@@ -63,7 +128,7 @@ def process_member_data(member_data, detailed_profile):
     base_data = {
         "Company Name": clean_text(member_data.get("company_name", "N/A")),
         "Membership No": clean_text(member_data.get("membership_no", "N/A")),
-        "Membership Type": clean_text(member_data.get("membership_type", "N/A")),
+        "Membership Type": intern_text(clean_text(member_data.get("membership_type", "N/A"))),
         "Establishment": f"{member_data.get('establishment_month', '')} {member_data.get('establishment_year', '')}".strip() or "N/A",
         "Logo URL": BASE_URL + member_data.get("logo", "") if member_data.get("logo") else "N/A",
         "Short Profile": clean_text(member_data.get("short_profile", "N/A")),
@@ -90,86 +155,73 @@ def process_member_data(member_data, detailed_profile):
             if service.get("service"):
                 categories.append(service["service"])
 
-        base_data["Services"] = ", ".join(categories) if categories else "N/A"
+        base_data["Services"] = intern_text(", ".join(categories)) if categories else "N/A"
         return base_data, categories
 
     return base_data, []
 
 
-def save_to_excel(data, filepath):
-    """Save data to Excel file with error handling."""
+def save_data(data, filepath):
+    """Save data to Parquet, or Excel for .xlsx paths, with error handling."""
     try:
-        df = pd.DataFrame(data)
-        df.to_excel(filepath, index=False, engine='openpyxl')
+        df = pd.DataFrame(data, copy=False)
+        df = df.astype({name: "category" for name in CATEGORICAL_COLUMNS if name in df})
+        if filepath.endswith('.xlsx'):
+            df.to_excel(filepath, index=False, engine='openpyxl')
+        else:
+            # Parquet needs one type per column, but e.g. postcodes mix ints and "N/A"
+            text_columns = df.select_dtypes("object").columns
+            df.astype(dict.fromkeys(text_columns, "string")).to_parquet(filepath, index=False, compression='zstd')
         print(f"Successfully saved: {filepath}")
     except Exception as e:
-        print(f"Error saving Excel file {filepath}: {e}")
+        print(f"Error saving file {filepath}: {e}")
         # Fallback to CSV
-        csv_filepath = filepath.replace('.xlsx', '.csv')
+        csv_filepath = os.path.splitext(filepath)[0] + '.csv'
         df.to_csv(csv_filepath, index=False, encoding='utf-8')
         print(f"Saved as CSV instead: {csv_filepath}")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape BASIS member profiles.")
+    parser.add_argument("--excel", action="store_true", help="save .xlsx workbooks instead of Parquet files")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    extension = "xlsx" if args.excel else "parquet"
     print("Starting BASIS member data collection...")
     base_dir, categories_dir = create_directories()
 
     # Storage for categorized data
     category_data = defaultdict(list)
-    all_members = []
-
-    current_page = 1
-    total_pages = None
-
-    while True:
-        print(f"\nProcessing page {current_page}...")
-        response = get_member_list(current_page)
-
-        if not response:
-            break
-
-        members = response.get("data", [])
-        if not members:
-            break
-
-        if total_pages is None:
-            total_pages = response.get("meta", {}).get("last_page")
-            print(f"Total pages to process: {total_pages}")
-
-        for member in members:
-            membership_no = member.get("membership_no")
-            print(f"Fetching profile for member: {membership_no}")
-
-            detailed_profile = get_company_profile(membership_no)
-            processed_data, categories = process_member_data(member, detailed_profile)
-
-            all_members.append(processed_data)
-
-            # Categorize by services
-            if categories:
-                for category in categories:
-                    category_data[category].append(processed_data)
+    # Complete dataset is collected column by column so the DataFrame wraps the lists directly
+    all_members = {name: [] for name in COLUMN_NAMES}
+    member_count = 0
 
-            # Add delay between requests
-            time.sleep(random.uniform(1, 2))
+    for member, detailed_profile in asyncio.run(collect_members()):
+        processed_data, categories = process_member_data(member, detailed_profile)
 
-        if current_page >= total_pages:
-            break
+        for name in COLUMN_NAMES:
+            all_members[name].append(processed_data.get(name))
+        member_count += 1
 
-        current_page += 1
-        time.sleep(random.uniform(2, 3))
+        # Categorize by services
+        if categories:
+            for category in categories:
+                category_data[category].append(processed_data)
 
     # Save complete dataset
-    save_to_excel(all_members, os.path.join(base_dir, "all_members.xlsx"))
+    save_data(all_members, os.path.join(base_dir, f"all_members.{extension}"))
 
     # Save category-specific files
     for category, members in category_data.items():
         if members:
-            filename = f"{category.replace('/', '_').replace(' ', '_')}.xlsx"
-            save_to_excel(members, os.path.join(categories_dir, filename))
+            filename = f"{category.translate(FILENAME_TRANS)}.{extension}"
+            save_data(members, os.path.join(categories_dir, filename))
 
     print("\nData Collection Summary:")
-    print(f"Total members collected: {len(all_members)}")
+    print(f"Total members collected: {member_count}")
     print(f"Total service categories: {len(category_data)}")
     print(f"Data saved in: {base_dir}")
     print(f"Category files saved in: {categories_dir}")
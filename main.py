@@ -1,9 +1,12 @@
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import time
 import random
 import os
-import re
+from html import escape
 
 # Base URL for constructing absolute links
 BASE_URL = "https://e-cab.net"
@@ -14,6 +17,36 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
+# Query parameters shared by every member-list request; only "page" varies
+MEMBER_LIST_PARAMS = {
+    "member_category": "General",
+    "team": ""
+}
+
+# Output columns, in the order process_member_data fills them
+COLUMN_NAMES = [
+    "Company Name", "Logo", "Membership No", "Membership Type",
+    "Member Category", "Short Profile", "Establishment", "Website URL"
+]
+
+# Low-cardinality columns, interned while scraping and stored as pandas categoricals
+CATEGORICAL_COLUMNS = ["Membership Type", "Member Category"]
+INTERNED_TEXT = {}
+
+# Deletes control characters Excel rejects and turns line breaks into spaces
+EXCEL_CONTROL_TRANS = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+EXCEL_CONTROL_TRANS.update({ord('\r'): ' ', ord('\n'): ' '})
+
+# Shared session so every request reuses pooled keep-alive connections
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.params.update(MEMBER_LIST_PARAMS)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+))
+
 
 def clean_text_for_excel(text):
     """
@@ -21,12 +54,12 @@ def clean_text_for_excel(text):
     """
     if not isinstance(text, str):
         return text
+    return text.translate(EXCEL_CONTROL_TRANS)
+
 
-    # Replace problematic characters
-    text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
-    # Replace other potentially problematic characters
-    text = text.replace('\r\n', ' ').replace('\n', ' ').replace('\r', ' ')
-    return text
+def intern_text(text):
+    """Return one shared copy of a value that repeats across many members."""
+    return INTERNED_TEXT.setdefault(text, text)
 
 
 def create_data_directory():
@@ -34,8 +67,7 @@ def create_data_directory():
     Create a directory for storing the scraped data if it doesn't exist.
     """
     directory = "e-cab-data"
-    if not os.path.exists(directory):
-        os.makedirs(directory)
+    os.makedirs(directory, exist_ok=True)
     return directory
 
 
@@ -44,16 +76,11 @@ def get_paginated_data(page=1):
     Retrieves member data from the API with pagination and category filter.
     Returns the JSON response containing member data and pagination metadata.
     """
-    params = {
-        "page": page,
-        "member_category": "General",
-        "team": ""
-    }
     try:
-        response = requests.get(API_ENDPOINT, headers=HEADERS, params=params)
+        response = SESSION.get(API_ENDPOINT, params={"page": page}, timeout=10)
         response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
+        return orjson.loads(response.content)
+    except (requests.RequestException, orjson.JSONDecodeError) as e:
         print(f"Error fetching page {page}: {e}")
         return None
 
@@ -67,8 +94,8 @@ def process_member_data(member):
         "Company Name": clean_text_for_excel(member.get("company_name", "N/A")),
         "Logo": clean_text_for_excel(BASE_URL + member.get("company_logo", "") if member.get("company_logo") else "N/A"),
         "Membership No": clean_text_for_excel(member.get("membership_no", "N/A")),
-        "Membership Type": clean_text_for_excel(member.get("membership_type", "N/A")),
-        "Member Category": clean_text_for_excel(member.get("member_category", "N/A")),
+        "Membership Type": intern_text(clean_text_for_excel(member.get("membership_type", "N/A"))),
+        "Member Category": intern_text(clean_text_for_excel(member.get("member_category", "N/A"))),
         "Short Profile": clean_text_for_excel(member.get("short_profile", "N/A")),
         "Establishment": clean_text_for_excel(
             f"{member.get('establishment_month', 'N/A')} {member.get('establishment_year', 'N/A')}"
@@ -77,11 +104,8 @@ def process_member_data(member):
     }
 
 
-def generate_html_display(members_data):
-    """
-    Generates HTML content similar to the member-list page format.
-    """
-    html_content = """
+# Static parts of the generated member-list page; cards are filled in per member
+HTML_HEADER = """
     <html>
     <head>
         <style>
@@ -116,25 +140,44 @@ def generate_html_display(members_data):
         <div class="member-grid">
     """
 
-    for member in members_data:
-        html_content += f"""
+MEMBER_CARD_TEMPLATE = """
             <div class="member-card">
-                <img src="{member['Logo']}" alt="{member['Company Name']}" class="member-logo">
+                <img src="{logo}" alt="{name}" class="member-logo">
                 <div class="member-info">
-                    <div class="member-name">{member['Company Name']}</div>
-                    <div>Member No: {member['Membership No']}</div>
-                    <div>Category: {member['Member Category']}</div>
-                    <div>Established: {member['Establishment']}</div>
+                    <div class="member-name">{name}</div>
+                    <div>Member No: {membership_no}</div>
+                    <div>Category: {category}</div>
+                    <div>Established: {establishment}</div>
                 </div>
             </div>
         """
 
-    html_content += """
+HTML_FOOTER = """
         </div>
     </body>
     </html>
     """
-    return html_content
+
+
+def generate_html_display(columns):
+    """
+    Generates HTML content similar to the member-list page format from column lists.
+    Field values are HTML-escaped so quotes or tags in names can't break the markup.
+    """
+    cards = [
+        MEMBER_CARD_TEMPLATE.format(
+            logo=escape(str(logo)),
+            name=escape(str(name)),
+            membership_no=escape(str(membership_no)),
+            category=escape(str(category)),
+            establishment=escape(str(establishment)),
+        )
+        for logo, name, membership_no, category, establishment in zip(
+            columns['Logo'], columns['Company Name'], columns['Membership No'],
+            columns['Member Category'], columns['Establishment']
+        )
+    ]
+    return HTML_HEADER + "".join(cards) + HTML_FOOTER
 
 
 def save_data(df, html_content, data_dir):
@@ -165,7 +208,8 @@ def save_data(df, html_content, data_dir):
 def main():
     print("Starting the data collection process...")
     data_dir = create_data_directory()
-    all_members = []
+    # Collect members column by column so the DataFrame wraps the lists directly
+    columns = {name: [] for name in COLUMN_NAMES}
     current_page = 1
     total_pages = None
 
@@ -180,7 +224,8 @@ def main():
         members_data = response_data.get("data", [])
         for member in members_data:
             processed_data = process_member_data(member)
-            all_members.append(processed_data)
+            for name, value in processed_data.items():
+                columns[name].append(value)
 
         meta = response_data.get("meta", {})
         if total_pages is None:
@@ -196,10 +241,11 @@ def main():
         time.sleep(random.uniform(1, 3))
 
     # Convert to DataFrame
-    df = pd.DataFrame(all_members)
+    df = pd.DataFrame(columns, copy=False)
+    df = df.astype(dict.fromkeys(CATEGORICAL_COLUMNS, "category"))
 
     # Generate HTML display
-    html_output = generate_html_display(all_members)
+    html_output = generate_html_display(columns)
 
     # Save files
     save_data(df, html_output, data_dir)
@@ -1,9 +1,17 @@
-import requests
+import argparse
+import httpx
 import pandas as pd
+import openpyxl
 import time
-import random
 import os
+import re
+import orjson
+import shelve
+from contextlib import closing
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from collections import defaultdict
+from itertools import chain
 
 # Base URL for constructing absolute links
 BASE_URL = "https://e-cab.net"
@@ -15,13 +23,155 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
+# Connect timeout of 5s, 30s for everything else, on every API request
+REQUEST_TIMEOUT = httpx.Timeout(30, connect=5)
 
-def clean_text_for_excel(text):
-    """Clean text to remove or replace characters that Excel can't handle."""
-    if not isinstance(text, str):
-        return text
-    text = str(text).replace('\r\n', ' ').replace('\n', ' ').replace('\r', ' ')
-    return text
+# Statuses retried with exponential backoff before a request is given up on
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+# Buffer size for every output file, so writers make few large writes instead of many small ones
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Listing pages and profiles fetched in parallel, and the overall request rate every GET shares
+PAGE_WORKERS = 4
+PROFILE_WORKERS = 8
+REQUESTS_PER_SECOND = 4
+
+# Shared HTTP/2 client, so concurrent listing and profile requests multiplex over one connection
+SESSION = httpx.Client(
+    headers=HEADERS,
+    timeout=REQUEST_TIMEOUT,
+    # requests followed redirects by default; httpx only does when asked
+    follow_redirects=True,
+    transport=httpx.HTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+        retries=MAX_RETRIES  # connection failures only; statuses are retried in get_json
+    )
+)
+
+
+# Runs of line breaks Excel can't handle, replaced by a single space
+LINE_BREAK_RE = re.compile(r"[\r\n]+")
+
+
+def clean_text_for_excel(df):
+    """Replace line breaks Excel can't handle in every text column, leaving other values untouched."""
+    # "string" also picks up pandas' dedicated str dtype, which "object" alone no longer will
+    text_columns = df.select_dtypes(["object", "string"]).columns
+    df[text_columns] = df[text_columns].replace(LINE_BREAK_RE, " ", regex=True)
+    return df
+
+
+class RateLimiter:
+    """Spaces acquire() calls at least 1/rate seconds apart across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+RATE_LIMITER = RateLimiter(REQUESTS_PER_SECOND)
+
+# Characters Excel does not allow in sheet titles
+SHEET_TITLE_TRANS = str.maketrans(dict.fromkeys("\\/?*[]:", "_"))
+
+# Spaces and characters Windows or POSIX do not allow in filenames
+FILENAME_TRANS = str.maketrans(dict.fromkeys('/\\: *?"<>|\t\n\r', "_"))
+
+
+class ResponseCache:
+    """Thread-safe on-disk store of (ETag, Last-Modified, body) per request URL."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.store = None
+
+    def get(self, key):
+        with self.lock:
+            return self._open().get(key)
+
+    def put(self, key, entry):
+        with self.lock:
+            self._open()[key] = entry
+
+    def close(self):
+        with self.lock:
+            if self.store is not None:
+                self.store.close()
+                self.store = None
+
+    def _open(self):
+        if self.store is None:
+            self.store = shelve.open(self.path)
+        return self.store
+
+
+RESPONSE_CACHE = ResponseCache(os.path.join("e-cab-data", "http_cache"))
+
+
+class SingleFlight:
+    """Runs one call per key at a time and reuses its non-None result for ttl seconds."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        # Inserted in expiry order, so expired entries are always at the front
+        self.results = {}
+
+    def do(self, key, fn):
+        with self.lock:
+            cached = self.results.get(key)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+            future = self.in_flight.get(key)
+            if future is None:
+                future = self.in_flight[key] = Future()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            return future.result()
+
+        result = None
+        try:
+            result = fn()
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+                if result is not None:
+                    self._remember(key, result)
+            future.set_result(result)
+        return result
+
+    def _remember(self, key, result):
+        now = time.monotonic()
+        while self.results:
+            oldest = next(iter(self.results))
+            if self.results[oldest][0] > now:
+                break
+            del self.results[oldest]
+        self.results.pop(key, None)
+        self.results[key] = (now + self.ttl, result)
+
+
+# Duplicate membership numbers within this window share one profile request
+PROFILE_TTL = 300
+PROFILE_REQUESTS = SingleFlight(PROFILE_TTL)
 
 
 def create_data_directory():
@@ -29,160 +179,305 @@ def create_data_directory():
     base_dir = "e-cab-data"
     categories_dir = os.path.join(base_dir, "categories")
 
-    for directory in [base_dir, categories_dir]:
-        if not os.path.exists(directory):
-            os.makedirs(directory)
+    os.makedirs(categories_dir, exist_ok=True)
 
     return base_dir, categories_dir
 
 
+def get_json(url, params=None):
+    """GET a JSON document, revalidating a cached copy so unchanged responses come back as 304."""
+    key = str(SESSION.build_request("GET", url, params=params).url)
+    cached = RESPONSE_CACHE.get(key)
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    for attempt in range(MAX_RETRIES + 1):
+        RATE_LIMITER.acquire()
+        response = SESSION.get(url, params=params, headers=headers)
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            break
+        time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    if response.status_code == 304 and cached:
+        return orjson.loads(cached[2])
+    response.raise_for_status()
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag or last_modified:
+        RESPONSE_CACHE.put(key, (etag, last_modified, response.content))
+    return orjson.loads(response.content)
+
+
 def get_paginated_data(page=1):
     """Retrieve member data from the API with pagination."""
+    print(f"Fetching page {page}...")
     params = {
         "page": page,
         "member_category": "General",
         "team": ""
     }
     try:
-        response = requests.get(API_ENDPOINT, headers=HEADERS, params=params)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
+        return get_json(API_ENDPOINT, params=params)
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
         print(f"Error fetching page {page}: {e}")
         return None
 
 
 def get_company_profile(membership_no):
+    """Fetch detailed company profile, sharing one request between concurrent lookups."""
+    return PROFILE_REQUESTS.do(membership_no, lambda: fetch_company_profile(membership_no))
+
+
+def fetch_company_profile(membership_no):
     """Fetch detailed company profile."""
     try:
         url = f"{PROFILE_ENDPOINT}/{membership_no}"
-        response = requests.get(url, headers=HEADERS)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
+        print(f"Fetching detailed profile for member {membership_no}...")
+        return get_json(url)
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
         print(f"Error fetching profile for member {membership_no}: {e}")
         return None
 
 
+# Output column order
+COLUMN_NAMES = [
+    "Company Name", "Logo", "Membership No", "Membership Type", "Member Category", "Establishment",
+    "Office Address", "Postal Code", "Phone", "Email", "Website", "Legal Structure",
+    "TIN Number", "Trade License No", "Valid Till", "Business Activities"
+]
+
+# (column, member list key) copied as-is from every listing entry
+BASE_FIELDS = [
+    ("Company Name", "company_name"),
+    ("Membership No", "membership_no"),
+    ("Membership Type", "membership_type"),
+    ("Member Category", "member_category"),
+]
+
+# (column, profile key) copied as-is from the detailed profile
+PROFILE_FIELDS = [
+    ("Office Address", "current_office_address"),
+    ("Postal Code", "current_office_postal_code"),
+    ("Phone", "work_phone"),
+    ("Website", "website"),
+    ("Legal Structure", "legal_structure"),
+    ("TIN Number", "tin_number"),
+    ("Trade License No", "trade_license_no"),
+    ("Valid Till", "valid_till"),
+]
+
+
+def first_email(emails):
+    """Return the first address from a profile's emails, which nests lists as [{"email": [{"email": ...}]}]."""
+    while isinstance(emails, list) and emails and isinstance(emails[0], dict):
+        emails = emails[0].get("email")
+    return emails or "N/A"
+
+
 def process_member_data(member, detailed_profile=None):
     """Process member data including detailed profile information."""
-    base_data = {
-        "Company Name": clean_text_for_excel(member.get("company_name", "N/A")),
-        "Logo": clean_text_for_excel(BASE_URL + member.get("company_logo", "") if member.get("company_logo") else "N/A"),
-        "Membership No": clean_text_for_excel(member.get("membership_no", "N/A")),
-        "Membership Type": clean_text_for_excel(member.get("membership_type", "N/A")),
-        "Member Category": clean_text_for_excel(member.get("member_category", "N/A")),
-        "Establishment": f"{member.get('establishment_month', 'N/A')} {member.get('establishment_year', 'N/A')}",
-        # "Website URL": clean_text_for_excel(member.get("FullUrl", "N/A"))
+    base_data = {label: member.get(key, "N/A") for label, key in BASE_FIELDS}
+    logo = member.get("company_logo")
+    base_data["Logo"] = BASE_URL + logo if logo else "N/A"
+    base_data["Establishment"] = f"{member.get('establishment_month', 'N/A')} {member.get('establishment_year', 'N/A')}"
+    # base_data["Website URL"] = member.get("FullUrl", "N/A")
+
+    business_activities = []
+    profile = detailed_profile.get("member") if detailed_profile else None
+    if profile:
+        for label, key in PROFILE_FIELDS:
+            base_data[label] = profile.get(key, "N/A")
+        base_data["Email"] = first_email(profile.get("emails"))
+        business_activities = [activity for activity in profile.get("business_activity") or () if "activity" in activity]
+        base_data["Business Activities"] = ", ".join(activity["activity"] for activity in business_activities)
+
+    return base_data, business_activities
+
+
+def excel_value(value):
+    """Return a value openpyxl can store; nested lists/dicts are written as text, NaN as blank."""
+    if isinstance(value, (list, dict)):
+        return str(value)
+    return None if pd.isna(value) else value
+
+
+def append_rows(sheet, df):
+    """Append a header and one line per DataFrame row to a write-only sheet."""
+    sheet.append(list(df.columns))
+    for row in df.itertuples(index=False, name=None):
+        sheet.append([excel_value(value) for value in row])
+
+
+def write_excel(df, filepath):
+    """Stream a DataFrame into a write-only workbook."""
+    workbook = openpyxl.Workbook(write_only=True)
+    append_rows(workbook.create_sheet(), df)
+    with open(filepath, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        workbook.save(f)
+
+
+def write_excel_sheets(sheets, filepath):
+    """Stream every sheet title -> DataFrame mapping into one write-only workbook."""
+    workbook = openpyxl.Workbook(write_only=True)
+    for title, df in sheets.items():
+        # Excel titles are limited to 31 characters; openpyxl renames duplicates
+        append_rows(workbook.create_sheet(title=title.translate(SHEET_TITLE_TRANS)[:31]), df)
+    with open(filepath, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        workbook.save(f)
+
+
+def write_parquet(df, filepath):
+    """Write a DataFrame to a zstd-compressed Parquet file."""
+    # Parquet needs one type per column, but e.g. postal codes mix ints and "N/A"
+    text_columns = df.select_dtypes("object").columns
+    with open(filepath, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        df.astype(dict.fromkeys(text_columns, "string")).to_parquet(f, index=False, compression="zstd")
+
+
+def save_rows(df, filepath):
+    """Save a DataFrame as .xlsx or .parquet by extension, falling back to CSV. Returns the path written."""
+    try:
+        if filepath.endswith(".parquet"):
+            write_parquet(df, filepath)
+        else:
+            write_excel(df, filepath)
+        return filepath
+    except Exception as e:
+        print(f"Error saving {filepath}: {e}")
+        # Fallback to CSV if Excel/Parquet fails
+        csv_filepath = os.path.splitext(filepath)[0] + ".csv"
+        with open(csv_filepath, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+            df.to_csv(f, index=False, encoding='utf-8')
+        print(f"Saved as CSV instead: {csv_filepath}")
+        return csv_filepath
+
+
+def load_members(filepath):
+    """Read streamed member rows back from JSONL, indexed by membership number and cleaned for Excel."""
+    df = pd.read_json(filepath, lines=True, dtype=False, convert_dates=False).reindex(columns=COLUMN_NAMES)
+    df = df.set_index("Membership No", drop=False)
+    # A membership number listed twice keeps its latest row, at the position it was first listed
+    df = df[~df.index.duplicated(keep="last")].reindex(df.index.unique())
+    return clean_text_for_excel(df)
+
+
+def category_filename(category, extension):
+    """Build a filesystem-safe filename for a business activity category."""
+    return f"{category.translate(FILENAME_TRANS)}.{extension}"
+
+
+def save_category_data(category_data, members_df, categories_dir, file_format="xlsx"):
+    """Save business activity categories as one multi-sheet workbook, or one Parquet file each.
+
+    category_data maps each category to membership numbers, looked up in members_df's index here.
+    """
+    categories = {
+        category: members_df.loc[list(dict.fromkeys(membership_nos))]
+        for category, membership_nos in category_data.items() if membership_nos
     }
 
-    if detailed_profile and 'member' in detailed_profile:
-        profile = detailed_profile['member']
-        base_data.update({
-            "Office Address": clean_text_for_excel(profile.get("current_office_address", "N/A")),
-            "Postal Code": profile.get("current_office_postal_code", "N/A"),
-            "Phone": clean_text_for_excel(profile.get("work_phone", "N/A")),
-            "Email": clean_text_for_excel(
-                profile.get("emails", [{}])
-                if isinstance(profile.get("emails", []), list) and profile.get("emails", [])
-                else [{}]
-            )[0].get("email", "N/A"),
-            "Website": clean_text_for_excel(profile.get("website", "N/A")),
-            "Legal Structure": clean_text_for_excel(profile.get("legal_structure", "N/A")),
-            "TIN Number": clean_text_for_excel(profile.get("tin_number", "N/A")),
-            "Trade License No": clean_text_for_excel(profile.get("trade_license_no", "N/A")),
-            "Valid Till": clean_text_for_excel(profile.get("valid_till", "N/A")),
-            "Business Activities": ", ".join([activity["activity"] for activity in profile.get("business_activity", [])])
-        })
-
-    return base_data, profile.get("business_activity", []) if detailed_profile and 'member' in detailed_profile else []
-
-
-def save_category_data(category_data, categories_dir):
-    """Save data to separate Excel files based on business activities."""
-    for category, members in category_data.items():
-        if members:
-            filename = f"{category.replace('/', '_').replace(' ', '_')}.xlsx"
-            filepath = os.path.join(categories_dir, filename)
-            df = pd.DataFrame(members)
-            try:
-                df.to_excel(filepath, index=False, engine='openpyxl')
-                print(f"Saved category file: {filename} with {len(members)} members")
-            except Exception as e:
-                print(f"Error saving {filename}: {e}")
-                # Fallback to CSV if Excel fails
-                csv_filepath = filepath.replace('.xlsx', '.csv')
-                df.to_csv(csv_filepath, index=False, encoding='utf-8')
-                print(f"Saved as CSV instead: {csv_filepath}")
+    if file_format == "parquet":
+        for category, members in categories.items():
+            filepath = save_rows(members, os.path.join(categories_dir, category_filename(category, "parquet")))
+            print(f"Saved category file: {filepath} with {len(members)} members")
+        return
 
+    filepath = os.path.join(categories_dir, "categories.xlsx")
+    try:
+        write_excel_sheets(categories, filepath)
+        print(f"Saved {len(categories)} category sheets to: {filepath}")
+    except Exception as e:
+        print(f"Error saving {filepath}: {e}")
+        # Fallback to one CSV per category if Excel fails
+        for category, members in categories.items():
+            csv_filepath = os.path.join(categories_dir, category_filename(category, "csv"))
+            with open(csv_filepath, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+                members.to_csv(f, index=False, encoding='utf-8')
+            print(f"Saved as CSV instead: {csv_filepath}")
 
-def main():
-    print("Starting the data collection process...")
-    base_dir, categories_dir = create_data_directory()
 
-    # Dictionary to store members by category
-    category_data = defaultdict(list)
-    all_members = []
-    current_page = 1
-    total_pages = None
+def write_page_members(page, members_data, futures, members_file, category_data):
+    """Stream one page's processed members to members_file and index them by business activity."""
+    for member, future in zip(members_data, futures):
+        detailed_profile = future.result()
 
-    while True:
-        print(f"Fetching page {current_page}...")
-        response_data = get_paginated_data(current_page)
+        # Process member data
+        processed_data, business_activities = process_member_data(member, detailed_profile)
+        membership_no = processed_data["Membership No"]
+        members_file.write(orjson.dumps(processed_data) + b"\n")
 
-        if not response_data:
-            print(f"Failed to fetch page {current_page}")
-            break
+        # Categorize member by business activities
+        for activity in business_activities:
+            category_data[activity["activity"]].append(membership_no)
+
+    # Keep every finished page on disk in case a later page crashes the run
+    members_file.flush()
+    print(f"Processed {len(members_data)} members from page {page}")
 
-        members_data = response_data.get("data", [])
-        for member in members_data:
-            membership_no = member.get("membership_no")
 
-            # Fetch detailed profile
-            print(f"Fetching detailed profile for member {membership_no}...")
-            detailed_profile = get_company_profile(membership_no)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape e-CAB member profiles.")
+    parser.add_argument("--format", choices=["xlsx", "parquet"], default="xlsx",
+                        help="output format for the complete and per-category data (default: xlsx)")
+    return parser.parse_args()
 
-            # Process member data
-            processed_data, business_activities = process_member_data(member, detailed_profile)
-            all_members.append(processed_data)
 
-            # Categorize member by business activities
-            if business_activities:
-                for activity in business_activities:
-                    category_name = activity["activity"]
-                    category_data[category_name].append(processed_data)
+def main():
+    args = parse_args()
+    print("Starting the data collection process...")
+    base_dir, categories_dir = create_data_directory()
 
-            # Add delay between requests
-            time.sleep(random.uniform(1, 2))
+    # Member rows are streamed to disk as they complete; categories only list membership numbers
+    members_path = os.path.join(base_dir, "members.jsonl")
+    category_data = defaultdict(list)
 
-        meta = response_data.get("meta", {})
-        if total_pages is None:
-            total_pages = meta.get("last_page")
+    # The session and response cache are closed once every page and profile has been fetched
+    with SESSION, closing(RESPONSE_CACHE), open(members_path, "wb", buffering=WRITE_BUFFER_SIZE) as members_file, \
+            ThreadPoolExecutor(max_workers=PROFILE_WORKERS) as executor, \
+            ThreadPoolExecutor(max_workers=PAGE_WORKERS) as page_executor:
+        first_page = get_paginated_data(1)
+        if not first_page:
+            print("Failed to fetch page 1")
+            pages = []
+        else:
+            total_pages = first_page.get("meta", {}).get("last_page") or 1
             print(f"Total pages to process: {total_pages}")
+            # The page count is known from page 1, so the rest of the listing is fetched in parallel
+            pages = chain([first_page], page_executor.map(get_paginated_data, range(2, total_pages + 1)))
 
-        print(f"Processed {len(members_data)} members from page {current_page}")
+        previous_page = None
+        for current_page, response_data in enumerate(pages, start=1):
+            if not response_data:
+                print(f"Failed to fetch page {current_page}")
+                continue
 
-        if current_page >= total_pages:
-            break
+            members_data = response_data.get("data", [])
+            # Queue this page's profiles before waiting on the previous page's, so the workers never run dry
+            futures = [executor.submit(get_company_profile, member.get("membership_no")) for member in members_data]
+            if previous_page:
+                write_page_members(*previous_page, members_file, category_data)
+            previous_page = (current_page, members_data, futures)
+
+        if previous_page:
+            write_page_members(*previous_page, members_file, category_data)
 
-        current_page += 1
-        time.sleep(random.uniform(1, 3))
+    members_df = load_members(members_path)
 
     # Save complete data
-    complete_df = pd.DataFrame(all_members)
-    complete_file = os.path.join(base_dir, "all_members.xlsx")
-    try:
-        complete_df.to_excel(complete_file, index=False)
-        print(f"Saved complete data to: {complete_file}")
-    except Exception as e:
-        print(f"Error saving complete data: {e}")
-        complete_df.to_csv(complete_file.replace('.xlsx', '.csv'), index=False)
+    complete_file = save_rows(members_df, os.path.join(base_dir, f"all_members.{args.format}"))
+    print(f"Saved complete data to: {complete_file}")
 
     # Save category-specific files
-    save_category_data(category_data, categories_dir)
+    save_category_data(category_data, members_df, categories_dir, args.format)
 
     print("\nData Collection Summary:")
-    print(f"Total members collected: {len(all_members)}")
+    print(f"Total members collected: {len(members_df)}")
     print(f"Total categories found: {len(category_data)}")
     print("Files saved in directories:")
     print(f"- Complete data: {base_dir}")